@@ -3,13 +3,24 @@
 from __future__ import annotations
 
 import argparse
-import fnmatch
+import atexit
+import base64
+import email.utils
+import functools
+import hashlib
+import http.client
 import json
 import os
-from dataclasses import dataclass
+import queue
+import random
+import re
+import ssl
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Iterable
-from urllib import error, request
+from typing import Iterator, NamedTuple
+from urllib import parse, request
 
 
 SOURCE_EXTENSIONS = {
@@ -36,9 +47,34 @@ SOURCE_EXTENSIONS = {
     ".rs",
 }
 
+SOURCE_SUFFIXES = tuple(sorted(SOURCE_EXTENSIONS))
 
-@dataclass
-class FileSnippet:
+# Characters escaped inside a regex character class: set syntax and set operations (&&, ~~, ||, nested "[").
+BRACKET_ESCAPES = {char: f"\\{char}" for char in "\\[]^-&~|"}
+
+# Directory names whose child names a module, in priority order.
+MODULE_ANCHORS = ("src", "include", "lib", "app")
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_MODULES_PER_REQUEST = 4
+READ_WORKERS = 32
+REQUEST_TIMEOUT = 180
+MAX_REQUEST_ATTEMPTS = 6
+MAX_RETRY_BACKOFF = 30.0
+MAX_RETRY_AFTER = 120.0
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Shared encoder for prompt payloads: compact separators and no cycle check (payloads are plain trees).
+PAYLOAD_ENCODER = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(",", ":"))
+JSON_DECODER = json.JSONDecoder()
+
+_thread_state = threading.local()
+_open_connections: list[http.client.HTTPConnection] = []
+_open_connections_lock = threading.Lock()
+_print_lock = threading.Lock()
+
+
+class FileSnippet(NamedTuple):
     path: str
     content: str
 
@@ -53,13 +89,13 @@ def parse_args() -> argparse.Namespace:
         "--include",
         action="append",
         default=[],
-        help="Glob include filter relative to repo (repeatable)",
+        help="Gitignore-style glob include filter relative to repo (repeatable)",
     )
     parser.add_argument(
         "--exclude",
         action="append",
         default=["**/.git/**", "**/target/**", "**/build/**", "**/node_modules/**"],
-        help="Glob exclude filter relative to repo (repeatable)",
+        help="Gitignore-style glob exclude filter relative to repo (repeatable)",
     )
     parser.add_argument(
         "--max-files-per-module",
@@ -73,6 +109,30 @@ def parse_args() -> argparse.Namespace:
         default=10000,
         help="Maximum chars loaded from each source file",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Maximum number of concurrent AI tasks (analysis batches and insight pages), i.e. requests in flight",
+    )
+    parser.add_argument(
+        "--modules-per-request",
+        type=int,
+        default=DEFAULT_MODULES_PER_REQUEST,
+        help="Maximum number of small modules analyzed in a single AI request",
+    )
+    parser.add_argument(
+        "--max-chars-per-request",
+        type=int,
+        default=None,
+        help="Snippet character budget for a combined analysis request "
+        "(default: max-files-per-module x max-chars-per-file, i.e. one full module)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached analysis/insight results from previous runs",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -85,6 +145,7 @@ def load_text(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
+@functools.lru_cache(maxsize=8)
 def read_prompt_template(template_name: str) -> str:
     here = Path(__file__).resolve().parent
     template_path = here / "prompts" / template_name
@@ -93,61 +154,199 @@ def read_prompt_template(template_name: str) -> str:
     return load_text(template_path).strip()
 
 
-def should_include(rel_path: str, includes: list[str], excludes: list[str]) -> bool:
+def translate_bracket(body: str) -> str:
+    """Translate the inside of a glob "[...]" class; like fnmatch, reversed ranges such as "z-a" match nothing."""
+    negate = body[:1] in ("!", "^")
+    if negate:
+        body = body[1:]
+    items: list[str] = []
+    k = 0
+    while k < len(body):
+        if k + 2 < len(body) and body[k + 1] == "-":
+            low, high = body[k], body[k + 2]
+            if low <= high:
+                items.append(f"{BRACKET_ESCAPES.get(low, low)}-{BRACKET_ESCAPES.get(high, high)}")
+            k += 3
+        else:
+            items.append(BRACKET_ESCAPES.get(body[k], body[k]))
+            k += 1
+    if not items:
+        return "[^/]" if negate else "(?!)"
+    return f"(?!/)[{'^' if negate else ''}{''.join(items)}]"
+
+
+def translate_glob(pattern: str) -> str:
+    """Translate a gitignore-style glob ("**/" spans directories, "*" stays in one segment) into a regex."""
+    if pattern.startswith("/"):
+        pattern = pattern.lstrip("/")
+    elif "/" not in pattern.rstrip("/"):
+        pattern = f"**/{pattern}"
+    if pattern.endswith("/"):
+        pattern += "**"
+
+    parts: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            j = i
+            while j < n and pattern[j] == "*":
+                j += 1
+            at_segment_start = i == 0 or pattern[i - 1] == "/"
+            if j - i >= 2 and at_segment_start and j < n and pattern[j] == "/":
+                parts.append("(?:.*/)?")
+                j += 1
+            elif j - i >= 2 and at_segment_start and j == n:
+                parts.append(".*")
+            else:
+                parts.append("[^/]*")
+            i = j
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                parts.append(re.escape(char))
+                i += 1
+                continue
+            parts.append(translate_bracket(pattern[i + 1:j]))
+            i = j + 1
+        elif char == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    regex = "".join(parts)
+    return regex if regex.endswith(".*") else f"{regex}(?:/.*)?"
+
+
+def compile_globs(patterns: list[str]) -> re.Pattern[str] | None:
+    """Combine glob patterns into one regex so each path is matched in a single call."""
+    if not patterns:
+        return None
+    regexes = []
+    for pattern in patterns:
+        regex = translate_glob(pattern)
+        try:
+            re.compile(regex)
+        except re.error as exc:
+            raise SystemExit(f"Invalid glob pattern {pattern!r}: {exc}") from exc
+        regexes.append(f"(?:{regex})")
+    return re.compile("|".join(regexes), re.DOTALL)
+
+
+def should_include(
+    rel_path: str, include_re: re.Pattern[str] | None, exclude_re: re.Pattern[str] | None
+) -> bool:
     normalized = rel_path.replace("\\", "/")
-    if includes:
-        matched_include = any(fnmatch.fnmatch(normalized, pattern) for pattern in includes)
-        if not matched_include:
-            return False
-    if any(fnmatch.fnmatch(normalized, pattern) for pattern in excludes):
+    if include_re is not None and not include_re.fullmatch(normalized):
+        return False
+    if exclude_re is not None and exclude_re.fullmatch(normalized):
         return False
     return True
 
 
-def discover_source_files(repo: Path, includes: list[str], excludes: list[str]) -> list[Path]:
-    files: list[Path] = []
-    for path in repo.rglob("*"):
-        if not path.is_file():
+def is_excluded_dir(rel_dir: str, exclude_re: re.Pattern[str] | None) -> bool:
+    # A directory is pruned when an exclude pattern matches everything below it (e.g. "**/build/**").
+    return exclude_re is not None and exclude_re.fullmatch(f"{rel_dir}/") is not None
+
+
+def is_source_name(name: str) -> bool:
+    # Same result as os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS, via C-level endswith().
+    if not name.endswith(SOURCE_SUFFIXES) and (name.islower() or not name.lower().endswith(SOURCE_SUFFIXES)):
+        return False
+    # splitext() treats leading dots as part of the stem, so ".py" has no extension.
+    return "." in name.lstrip(".")
+
+
+def _walk_source_files(
+    abs_dir: str, rel_dir: str, include_re: re.Pattern[str] | None, exclude_re: re.Pattern[str] | None
+) -> Iterator[tuple[str, str]]:
+    try:
+        with os.scandir(abs_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not is_excluded_dir(rel, exclude_re):
+                    yield from _walk_source_files(entry.path, rel, include_re, exclude_re)
+                continue
+            if not entry.is_file():
+                continue
+        except OSError:
             continue
-        if path.suffix.lower() not in SOURCE_EXTENSIONS:
+        if not is_source_name(entry.name):
             continue
-        rel = path.relative_to(repo).as_posix()
-        if should_include(rel, includes, excludes):
-            files.append(path)
-    files.sort()
-    return files
+        if should_include(rel, include_re, exclude_re):
+            yield rel, entry.path
+
+
+def iter_source_files(repo: Path, includes: list[str], excludes: list[str]) -> Iterator[tuple[str, str]]:
+    """Yield (relative, absolute) source file paths in sorted path order, skipping excluded directory trees."""
+    yield from _walk_source_files(str(repo), "", compile_globs(includes), compile_globs(excludes))
 
 
 def choose_module(rel_path: str) -> str:
     parts = rel_path.split("/")
-    for anchor in ("src", "include", "lib", "app"):
-        if anchor in parts:
-            idx = parts.index(anchor)
-            if idx + 1 < len(parts):
-                return parts[idx + 1]
+    # One pass records the first position of each anchor; the anchor priority then picks the module.
+    first_index: dict[str, int] = {}
+    for index in range(len(parts) - 1):
+        part = parts[index]
+        if part in MODULE_ANCHORS and part not in first_index:
+            first_index[part] = index
+    for anchor in MODULE_ANCHORS:
+        if anchor in first_index:
+            return parts[first_index[anchor] + 1]
     return parts[0] if parts else "root"
 
 
-def load_snippets(
+def read_source_file(path: str, max_chars: int) -> str | None:
+    # Text-mode read(n) stops after n characters, so large files are never loaded in full.
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as handle:
+            return handle.read(max_chars)
+    except OSError:
+        return None
+
+
+def collect_snippets(
     repo: Path,
-    source_files: Iterable[Path],
+    includes: list[str],
+    excludes: list[str],
     max_chars_per_file: int,
     max_files_per_module: int,
-) -> dict[str, list[FileSnippet]]:
-    modules: dict[str, list[FileSnippet]] = {}
-    for file_path in source_files:
-        rel = file_path.relative_to(repo).as_posix()
+) -> tuple[dict[str, list[FileSnippet]], int]:
+    """Return snippets per module (reading only files under the per-module cap) and the matching file count."""
+    selected: list[tuple[str, str, str]] = []
+    counts: dict[str, int] = {}
+    total = 0
+    for rel, abs_path in iter_source_files(repo, includes, excludes):
+        total += 1
         module = choose_module(rel)
-        module_files = modules.setdefault(module, [])
-        if len(module_files) >= max_files_per_module:
-            continue
-        try:
-            text = file_path.read_text(encoding="utf-8", errors="replace")
-        except OSError:
+        count = counts.setdefault(module, 0)
+        if count >= max_files_per_module:
             continue
-        text = text[:max_chars_per_file]
-        module_files.append(FileSnippet(path=rel, content=text))
-    return modules
+        counts[module] = count + 1
+        selected.append((module, rel, abs_path))
+
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        texts = executor.map(lambda item: read_source_file(item[2], max_chars_per_file), selected)
+        modules: dict[str, list[FileSnippet]] = {module: [] for module in counts}
+        for (module, rel, _), text in zip(selected, texts):
+            if text is not None:
+                modules[module].append(FileSnippet(path=rel, content=text))
+    return modules, total
 
 
 def resolve_chat_completions_url(api_base: str) -> str:
@@ -159,10 +358,129 @@ def resolve_chat_completions_url(api_base: str) -> str:
     return f"{normalized}/v1/chat/completions"
 
 
+class _HTTPProxyConnection(http.client.HTTPConnection):
+    """Plain-HTTP connection to a forward proxy; requests carry the absolute URL and proxy credentials."""
+
+    def __init__(self, host: str, port: int, proxy_headers: dict[str, str], **kwargs) -> None:
+        super().__init__(host, port, **kwargs)
+        self.proxy_headers = proxy_headers
+
+
+def _proxy_auth_headers(proxy_url: parse.SplitResult) -> dict[str, str]:
+    if proxy_url.username is None:
+        return {}
+    credentials = f"{parse.unquote(proxy_url.username)}:{parse.unquote(proxy_url.password or '')}"
+    token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return {"Proxy-Authorization": f"Basic {token}"}
+
+
+def _new_connection(scheme: str, host: str, port: int | None) -> http.client.HTTPConnection:
+    proxy = request.getproxies().get(scheme)
+    if proxy and not request.proxy_bypass(host):
+        # Like urllib, a proxy given as "host:port" is an HTTP proxy.
+        proxy_url = parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        if not proxy_url.hostname:
+            raise RuntimeError(f"AI request failed: invalid {scheme} proxy URL: {proxy}")
+        proxy_port = proxy_url.port or (443 if proxy_url.scheme == "https" else 80)
+        proxy_headers = _proxy_auth_headers(proxy_url)
+        if scheme == "https":
+            # Like urllib: CONNECT through the proxy, then wrap the tunnel in TLS to the target.
+            conn = http.client.HTTPSConnection(proxy_url.hostname, proxy_port, timeout=REQUEST_TIMEOUT)
+            conn.set_tunnel(host, port or 443, headers=proxy_headers)
+            return conn
+        return _HTTPProxyConnection(proxy_url.hostname, proxy_port, proxy_headers, timeout=REQUEST_TIMEOUT)
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, port, timeout=REQUEST_TIMEOUT)
+    return http.client.HTTPConnection(host, port, timeout=REQUEST_TIMEOUT)
+
+
+def _get_connection(url: parse.SplitResult) -> tuple[http.client.HTTPConnection, bool]:
+    """Return this thread's keep-alive connection for the URL origin and whether it is reused."""
+    connections = getattr(_thread_state, "connections", None)
+    if connections is None:
+        connections = _thread_state.connections = {}
+    key = (url.scheme, url.netloc)
+    conn = connections.get(key)
+    if conn is not None:
+        return conn, True
+    conn = _new_connection(url.scheme, url.hostname or "", url.port)
+    connections[key] = conn
+    with _open_connections_lock:
+        _open_connections.append(conn)
+    return conn, False
+
+
+def _drop_connection(url: parse.SplitResult) -> None:
+    conn = _thread_state.connections.pop((url.scheme, url.netloc), None)
+    if conn is not None:
+        conn.close()
+
+
+@atexit.register
+def _close_connections() -> None:
+    with _open_connections_lock:
+        for conn in _open_connections:
+            conn.close()
+        _open_connections.clear()
+
+
+def _send_request(
+    url: parse.SplitResult, request_url: str, data: bytes, headers: dict[str, str]
+) -> tuple[http.client.HTTPResponse, bytes]:
+    target = url.path or "/"
+    if url.query:
+        target = f"{target}?{url.query}"
+    while True:
+        conn, reused = _get_connection(url)
+        request_target, request_headers = target, headers
+        if isinstance(conn, _HTTPProxyConnection):
+            # Plain-HTTP proxies expect the absolute URL as the request target.
+            request_target, request_headers = request_url, {**headers, **conn.proxy_headers}
+        try:
+            conn.request("POST", request_target, body=data, headers=request_headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (http.client.HTTPException, OSError) as exc:
+            _drop_connection(url)
+            # The server may have closed an idle keep-alive socket; retry once on a fresh one.
+            if reused and isinstance(exc, ConnectionError):
+                continue
+            raise
+        if resp.will_close:
+            _drop_connection(url)
+        return resp, body
+
+
+def _is_transient_error(exc: BaseException) -> bool:
+    if isinstance(exc, ssl.SSLError):
+        # Handshake/certificate problems are configuration errors; only dropped TLS streams are retried.
+        return isinstance(exc, (ssl.SSLEOFError, ssl.SSLZeroReturnError))
+    return isinstance(exc, (http.client.HTTPException, OSError))
+
+
+def _retry_delay(attempt: int, retry_after: str | None) -> float:
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER)
+        except ValueError:
+            try:
+                when = email.utils.parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                when = None
+            if when is not None:
+                return min(max(when.timestamp() - time.time(), 0.0), MAX_RETRY_AFTER)
+    backoff = min(2 ** (attempt - 1), MAX_RETRY_BACKOFF)
+    return backoff * (0.5 + random.random())
+
+
+def chat_model() -> str:
+    return os.getenv("LITELLM_MODEL", "ollama-gemini-3-flash-preview")
+
+
 def make_chat_request(messages: list[dict[str, str]]) -> str:
     api_base = os.getenv("LITELLM_BASE_URL", "https://litellm.com/v1").rstrip("/")
     api_key = os.getenv("LITELLM_API_KEY")
-    model = os.getenv("LITELLM_MODEL", "ollama-gemini-3-flash-preview")
+    model = chat_model()
 
     if not api_key:
         raise RuntimeError("LITELLM_API_KEY is required")
@@ -174,56 +492,116 @@ def make_chat_request(messages: list[dict[str, str]]) -> str:
     }
     data = json.dumps(payload).encode("utf-8")
     request_url = resolve_chat_completions_url(api_base)
+    url = parse.urlsplit(request_url)
+    if url.scheme not in ("http", "https"):
+        raise RuntimeError(f"AI request failed: unsupported URL scheme. url={request_url}")
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+        "Accept": "application/json",
+        "User-Agent": "codex-insight/1.0",
+    }
 
-    req = request.Request(
-        url=request_url,
-        data=data,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json",
-            "User-Agent": "codex-insight/1.0",
-        },
-        method="POST",
-    )
+    for attempt in range(1, MAX_REQUEST_ATTEMPTS + 1):
+        try:
+            resp, body = _send_request(url, request_url, data, headers)
+        except (http.client.HTTPException, OSError) as exc:
+            if attempt == MAX_REQUEST_ATTEMPTS or not _is_transient_error(exc):
+                raise RuntimeError(f"AI request failed: {exc}") from exc
+            delay = _retry_delay(attempt, None)
+            report(f"AI request failed ({exc}); retrying in {delay:.1f}s (attempt {attempt}/{MAX_REQUEST_ATTEMPTS})")
+            time.sleep(delay)
+            continue
+        if resp.status in RETRYABLE_STATUS_CODES and attempt < MAX_REQUEST_ATTEMPTS:
+            delay = _retry_delay(attempt, resp.getheader("Retry-After"))
+            report(f"AI request returned {resp.status}; retrying in {delay:.1f}s (attempt {attempt}/{MAX_REQUEST_ATTEMPTS})")
+            time.sleep(delay)
+            continue
+        break
 
-    try:
-        with request.urlopen(req, timeout=180) as resp:
-            body = resp.read().decode("utf-8")
-    except error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace")
-        if exc.code in (401, 403):
+    if not 200 <= resp.status < 300:
+        detail = body.decode("utf-8", errors="replace")
+        if resp.status in (401, 403):
             raise RuntimeError(
                 "AI request failed: "
-                f"{exc.code} {detail}. "
+                f"{resp.status} {detail}. "
                 f"url={request_url}. "
                 "Check LITELLM_BASE_URL and LITELLM_API_KEY; for OpenAI-compatible gateways, "
                 "use a base URL like https://host/v1 or https://host/openai."
-            ) from exc
-        raise RuntimeError(f"AI request failed: {exc.code} {detail}. url={request_url}") from exc
-    except error.URLError as exc:
-        raise RuntimeError(f"AI request failed: {exc}") from exc
+            )
+        raise RuntimeError(f"AI request failed: {resp.status} {detail}. url={request_url}")
 
-    parsed = json.loads(body)
+    parsed = json.loads(body.decode("utf-8"))
     return parsed["choices"][0]["message"]["content"]
 
 
-def build_analysis_payload(module: str, snippets: list[FileSnippet]) -> str:
-    items = []
-    for index, snippet in enumerate(snippets, 1):
-        items.append(
-            {
-                "snippet_id": f"{module}-{index}",
-                "path": snippet.path,
-                "content": snippet.content,
-            }
-        )
-    return json.dumps({"module": module, "snippets": items}, ensure_ascii=False)
-
-
-def save_json(path: Path, obj: object) -> None:
+def build_analysis_payload(batch: list[tuple[str, list[FileSnippet]]]) -> str:
+    """Serialize the fixed {"batches": [...]} envelope by hand, encoding only the string values."""
+    encode = PAYLOAD_ENCODER.encode
+    parts = ['{"batches":[']
+    for batch_index, (module, snippets) in enumerate(batch):
+        parts.append(',{"module":' if batch_index else '{"module":')
+        parts.append(encode(module))
+        parts.append(',"snippets":[')
+        for index, snippet in enumerate(snippets, 1):
+            parts.append(',{"snippet_id":' if index > 1 else '{"snippet_id":')
+            parts.append(encode(f"{module}-{index}"))
+            parts.append(',"path":')
+            parts.append(encode(snippet.path))
+            parts.append(',"content":')
+            parts.append(encode(snippet.content))
+            parts.append("}")
+        parts.append("]}")
+    parts.append("]}")
+    return "".join(parts)
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    """Write via a temp file and os.replace so readers never see a partially written file."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+class OutputWriter:
+    """Writes output files on a background thread so AI request workers never block on disk I/O."""
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[tuple[Path, str] | None] = queue.Queue()
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, text = item
+            try:
+                write_text_atomic(path, text)
+            except Exception as exc:
+                # Keep draining the queue so one bad file doesn't drop every later write.
+                if self._error is None:
+                    self._error = exc
+
+    def write(self, path: Path, text: str) -> None:
+        self._queue.put((path, text))
+
+    def write_json(self, path: Path, obj: object) -> None:
+        self.write(path, json.dumps(obj, indent=2, ensure_ascii=False))
+
+    def close(self) -> None:
+        """Flush pending writes and re-raise the first write error, if any."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
 
 
 def sanitize_filename(value: str) -> str:
@@ -231,29 +609,103 @@ def sanitize_filename(value: str) -> str:
     return safe.strip("-") or "module"
 
 
-def generate_module_analysis(module: str, snippets: list[FileSnippet], analysis_prompt: str) -> dict:
-    user_payload = build_analysis_payload(module, snippets)
+def cache_key(*parts: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode("utf-8", errors="surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def analysis_cache_path(state_dir: Path, module: str, snippets: list[FileSnippet], analysis_prompt: str) -> Path:
+    key = cache_key(
+        chat_model(),
+        analysis_prompt,
+        module,
+        *(part for snippet in snippets for part in (snippet.path, snippet.content)),
+    )
+    return state_dir / f"{sanitize_filename(module)}.{key}.json"
+
+
+def insight_cache_path(insight_dir: Path, module: str, analysis: dict, insight_prompt: str) -> Path:
+    key = cache_key(chat_model(), insight_prompt, module, json.dumps(analysis, sort_keys=True))
+    return insight_dir / f"{sanitize_filename(module)}.{key}.md"
+
+
+def repo_cache_name(repo: Path) -> str:
+    return f"{sanitize_filename(repo.name)}-{cache_key(str(repo))[:12]}"
+
+
+def load_cached_analysis(path: Path) -> dict | None:
+    try:
+        cached = json.loads(load_text(path))
+    except (OSError, ValueError):
+        return None
+    # Empty analyses mean the model reply could not be parsed; ask again instead of reusing them.
+    return cached if isinstance(cached, dict) and cached else None
+
+
+def extract_json_object(content: str) -> dict | None:
+    """Return the first JSON object embedded in a model reply, ignoring surrounding prose or code fences."""
+    start = content.find("{")
+    while start != -1:
+        try:
+            parsed, _ = JSON_DECODER.raw_decode(content, start)
+        except json.JSONDecodeError:
+            start = content.find("{", start + 1)
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+        start = content.find("{", start + 1)
+    return None
+
+
+def generate_module_analysis(
+    batch: list[tuple[str, list[FileSnippet]]], analysis_prompt: str
+) -> dict[str, dict]:
+    user_payload = build_analysis_payload(batch)
     content = make_chat_request(
         [
             {"role": "system", "content": analysis_prompt},
             {"role": "user", "content": user_payload},
         ]
     )
-    content = content.strip()
-    start = content.find("{")
-    end = content.rfind("}")
-    if start != -1 and end != -1 and end >= start:
-        content = content[start:end+1]
-    if not content:
-        return {}
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {}
+    analyses: dict[str, dict] = {module: {} for module, _ in batch}
+    parsed = extract_json_object(content)
+    results = parsed.get("results") if parsed is not None else None
+    if not isinstance(results, list):
+        results = []
+    entries = [
+        (index, module if isinstance(module, str) else None, item.get("analysis"))
+        for index, item in enumerate(results)
+        if isinstance(item, dict) and isinstance(item.get("analysis"), dict)
+        for module in [item.get("module")]
+    ]
+    assigned: set[str] = set()
+    for _, module, analysis in entries:
+        if module in analyses and module not in assigned:
+            analyses[module] = analysis
+            assigned.add(module)
+    # Entries with an unknown module name fall back to their position, but only for slots still unfilled.
+    for index, module, analysis in entries:
+        if module in analyses or index >= len(batch):
+            continue
+        slot = batch[index][0]
+        if slot not in assigned:
+            analyses[slot] = analysis
+            assigned.add(slot)
+
+    missing = [(module, snippets) for module, snippets in batch if module not in assigned]
+    if len(batch) > 1 and missing:
+        # A truncated or malformed combined reply; ask again per module rather than writing pages from {}.
+        report(f"Warning: no usable analysis for {', '.join(m for m, _ in missing)}; retrying them one at a time")
+        for item in missing:
+            analyses.update(generate_module_analysis([item], analysis_prompt))
+    return analyses
 
 
 def generate_module_insight(module: str, analysis_json: dict, insight_prompt: str) -> str:
-    user_payload = json.dumps({"module": module, "analysis": analysis_json}, ensure_ascii=False)
+    user_payload = PAYLOAD_ENCODER.encode({"module": module, "analysis": analysis_json})
     return make_chat_request(
         [
             {"role": "system", "content": insight_prompt},
@@ -262,6 +714,65 @@ def generate_module_insight(module: str, analysis_json: dict, insight_prompt: st
     )
 
 
+def report(message: str) -> None:
+    with _print_lock:
+        print(message, flush=True)
+
+
+def batch_modules(
+    items: list[tuple[str, list[FileSnippet]]], max_modules: int, max_chars: int
+) -> list[list[tuple[str, list[FileSnippet]]]]:
+    """Pack modules in order into batches within the count and snippet-char limits; oversized modules go alone."""
+    batches: list[list[tuple[str, list[FileSnippet]]]] = []
+    current: list[tuple[str, list[FileSnippet]]] = []
+    current_chars = 0
+    for module, snippets in items:
+        size = sum(len(snippet.content) for snippet in snippets)
+        if current and (len(current) >= max(1, max_modules) or current_chars + size > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append((module, snippets))
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def analyze_module_batch(
+    batch: list[tuple[str, list[FileSnippet]]],
+    analysis_prompt: str,
+    cache_paths: dict[str, Path],
+    writer: OutputWriter,
+) -> dict[str, dict]:
+    analyses = generate_module_analysis(batch, analysis_prompt)
+    for module, analysis in analyses.items():
+        writer.write_json(cache_paths[module], analysis)
+        report(f"[1/2] Analyzed module: {module}")
+    return analyses
+
+
+def write_module_insight(
+    module: str,
+    analysis: dict,
+    insight_prompt: str,
+    out: Path,
+    insight_dir: Path,
+    use_cache: bool,
+    writer: OutputWriter,
+) -> str:
+    cache_path = insight_cache_path(insight_dir, module, analysis, insight_prompt)
+    if use_cache and cache_path.exists():
+        markdown = load_text(cache_path)
+        report(f"[2/2] Reused cached insight page: {module}")
+    else:
+        markdown = generate_module_insight(module, analysis, insight_prompt).strip() + "\n"
+        writer.write(cache_path, markdown)
+        report(f"[2/2] Generated insight page: {module}")
+    page_name = f"{sanitize_filename(module)}.md"
+    writer.write(out / page_name, markdown)
+    return page_name
+
+
 def build_system_page(module_pages: list[str]) -> str:
     lines = ["# System Architecture", "", "## Module Pages", ""]
     for page in module_pages:
@@ -280,15 +791,18 @@ def main() -> int:
     args = parse_args()
     repo = Path(args.repo).resolve()
     out = Path(args.out).resolve()
-    state_dir = Path(__file__).resolve().parent / ".codex-insight" / "analysis"
+    # Scope the cache per target repo so runs against different repos never share or clobber entries.
+    cache_dir = Path(__file__).resolve().parent / ".codex-insight" / repo_cache_name(repo)
+    state_dir = cache_dir / "analysis"
+    insight_dir = cache_dir / "insight"
 
     if not repo.exists() or not repo.is_dir():
         raise SystemExit(f"Repo path not found: {repo}")
 
-    source_files = discover_source_files(repo, args.include, args.exclude)
-    modules = load_snippets(
+    modules, file_count = collect_snippets(
         repo=repo,
-        source_files=source_files,
+        includes=args.include,
+        excludes=args.exclude,
         max_chars_per_file=args.max_chars_per_file,
         max_files_per_module=args.max_files_per_module,
     )
@@ -298,7 +812,7 @@ def main() -> int:
             "No matching source files were found for supported languages: C/C++, Java, Go, Python, Bash, JavaScript, TypeScript, Rust."
         )
 
-    print(f"Discovered {len(source_files)} source files in {len(modules)} modules")
+    print(f"Discovered {file_count} source files in {len(modules)} modules")
     for module, snippets in sorted(modules.items()):
         print(f"  - {module}: {len(snippets)} snippets")
 
@@ -312,20 +826,62 @@ def main() -> int:
     out.mkdir(parents=True, exist_ok=True)
     module_pages: list[str] = []
 
+    cached: dict[str, dict] = {}
+    pending: list[tuple[str, list[FileSnippet]]] = []
+    cache_paths: dict[str, Path] = {}
     for module, snippets in sorted(modules.items()):
-        print(f"[1/2] Analyzing module: {module}")
-        analysis = generate_module_analysis(module, snippets, analysis_prompt)
-        analysis_path = state_dir / f"{sanitize_filename(module)}.json"
-        save_json(analysis_path, analysis)
-
-        print(f"[2/2] Generating insight page: {module}")
-        markdown = generate_module_insight(module, analysis, insight_prompt)
-        page_name = f"{sanitize_filename(module)}.md"
-        (out / page_name).write_text(markdown.strip() + "\n", encoding="utf-8")
-        module_pages.append(page_name)
-
-    system_page = build_system_page(sorted(module_pages))
-    (out / "System-Architecture.md").write_text(system_page, encoding="utf-8")
+        cache_paths[module] = analysis_cache_path(state_dir, module, snippets, analysis_prompt)
+        analysis = None if args.no_cache else load_cached_analysis(cache_paths[module])
+        if analysis is None:
+            pending.append((module, snippets))
+        else:
+            cached[module] = analysis
+            print(f"[1/2] Reused cached analysis: {module}")
+
+    max_chars_per_request = args.max_chars_per_request
+    if max_chars_per_request is None:
+        max_chars_per_request = args.max_files_per_module * args.max_chars_per_file
+    batches = batch_modules(pending, args.modules_per_request, max_chars_per_request)
+    use_cache = not args.no_cache
+
+    writer = OutputWriter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            try:
+                insight_futures: list[Future[str]] = [
+                    executor.submit(
+                        write_module_insight, module, analysis, insight_prompt, out, insight_dir, use_cache, writer
+                    )
+                    for module, analysis in cached.items()
+                ]
+                analysis_futures = [
+                    executor.submit(analyze_module_batch, batch, analysis_prompt, cache_paths, writer)
+                    for batch in batches
+                ]
+                # Start each module's insight page as soon as its batch has been analyzed.
+                for future in as_completed(analysis_futures):
+                    for module, analysis in future.result().items():
+                        insight_futures.append(
+                            executor.submit(
+                                write_module_insight,
+                                module,
+                                analysis,
+                                insight_prompt,
+                                out,
+                                insight_dir,
+                                use_cache,
+                                writer,
+                            )
+                        )
+                for future in insight_futures:
+                    module_pages.append(future.result())
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        writer.write(out / "System-Architecture.md", build_system_page(sorted(module_pages)))
+    finally:
+        writer.close()
     print(f"Done. insight written to: {out}")
     return 0
 